@@ -2,23 +2,269 @@ from mcp.server.fastmcp import FastMCP
 from starlette.applications import Starlette
 from mcp.server.sse import SseServerTransport
 from starlette.requests import Request
+from starlette.responses import Response
 from starlette.routing import Mount, Route
 from mcp.server import Server
 import uvicorn
 import boto3
-import json
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from botocore.handlers import generate_idempotent_uuid
 import asyncio
-import os
-from typing import Any, Optional, Dict, List
+import functools
+import hashlib
+import json
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, Dict, List, Tuple
 
 # Initialize FastMCP server for Weather tools (SSE)
 mcp = FastMCP("instance_manager")
 
+# orjson encodes straight to bytes, which boto3 accepts as an invoke Payload.
+# Fall back to the stdlib, encoding to the same compact bytes, when it is missing.
+# Both decoders raise json.JSONDecodeError (orjson's is a subclass).
+try:
+    import orjson
+
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+    _loads = json.loads
+
 # Constants
 EXCLUDE_TAG_KEY = "CostNormExclude"
+# Upper bound on concurrent Lambda invokes per client. Keep this at or above the
+# number of tool calls expected to be in flight on the SSE server at once,
+# otherwise invokes queue for a free connection in botocore's pool.
+LAMBDA_MAX_CONCURRENCY = 64
+_VALID_ARCHS = frozenset({"arm64", "x86_64"})
+_VALID_EBS_ACTIONS = frozenset(
+    {
+        "snapshot_only",
+        "snapshot_and_delete",
+        "change_type",
+        "resize",
+        "change_type_and_resize",
+    }
+)
+
+# One session for the whole process so every regional client shares the same
+# credential resolver instead of re-walking the provider chain per tool call.
+_session = boto3.session.Session()
+# Fail fast on unreachable endpoints instead of botocore's 60 s connect default;
+# read_timeout covers the slowest synchronous backend Lambda we call.
+_BOTO_CFG = Config(
+    max_pool_connections=LAMBDA_MAX_CONCURRENCY,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=60,
+    retries={"max_attempts": 3, "mode": "adaptive"},
+)
+EBS_ANALYZE_READ_TIMEOUT = 120  # region-wide scans run longer than other tools
+EBS_ANALYZE_CHUNK_SIZE = 10  # volume_ids longer than this are analyzed in parallel
+
+# Payloads of tools without arguments never change; encode them once at import.
+_UNUSED_RESOURCE_PAYLOAD = _dumps({"operation": "analyze"})
+_GET_INSTANCE_INFO_PAYLOAD = _dumps({"body": {"tool_name": "get_instance_info"}})
+
+
+@functools.lru_cache(maxsize=None)
+def _get_lambda_client(region: str, read_timeout: Optional[int] = None):
+    """Returns the cached Lambda client for `region`, built from the shared session.
+
+    Clients are thread-safe, so one instance per (region, read_timeout) is reused
+    across tool calls and keeps its connection pool warm between invocations.
+
+    Pass `read_timeout` to override the default for backends that are known to
+    run longer than `_BOTO_CFG` allows.
+    """
+    config = _BOTO_CFG
+    if read_timeout is not None:
+        config = _BOTO_CFG.merge(Config(read_timeout=read_timeout))
+    client = _session.client("lambda", region_name=region, config=config)
+    # None of the Lambda operations we call take an idempotency token, so skip
+    # botocore's per-call scan of the input shape that looks for one.
+    client.meta.events.unregister("before-parameter-build", generate_idempotent_uuid)
+    return client
+
+
+# Blocking invokes run here rather than on the loop's default executor, which is
+# capped at min(32, cpu_count + 4) threads; match the botocore connection pool.
+_lambda_executor = ThreadPoolExecutor(
+    max_workers=LAMBDA_MAX_CONCURRENCY, thread_name_prefix="lambda-invoke"
+)
+
+# In-flight read-only invocations, keyed by a digest of function name + payload.
+_inflight: Dict[bytes, asyncio.Task] = {}
+
+
+async def _coalesce(
+    function_name: str, payload: bytes, invoke: Callable[[], Awaitable[Any]]
+) -> Any:
+    """Runs `invoke()` unless an identical invocation is already in flight.
+
+    Concurrent callers with the same function name and payload await the same
+    task, so a burst of identical tool calls costs a single Lambda round-trip.
+    Only use this for read-only backends.
+    """
+    key = hashlib.blake2b(
+        function_name.encode() + b"\0" + payload, digest_size=16
+    ).digest()
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(invoke())
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one caller going away does not cancel the others' result.
+    return await asyncio.shield(task)
+
+
+def _is_error_result(result: Any) -> bool:
+    """Whether a backend result reports a failure and must not be cached.
+
+    Covers error keys as well as API-Gateway-style `{"statusCode": 500, ...}`
+    responses.
+    """
+    if not isinstance(result, dict):
+        return False
+    if "error" in result or "errorMessage" in result:
+        return True
+    status_code = result.get("statusCode")
+    return isinstance(status_code, int) and not 200 <= status_code < 300
+
+
+def _async_ttl_cache(ttl: float, maxsize: int = 256):
+    """Caches a read-only coroutine's results per argument tuple for `ttl` seconds.
+
+    Entries hold the task rather than its result, so concurrent callers with the
+    same arguments share one in-flight invocation. Exceptions and error results
+    are evicted as soon as they complete instead of being served from the cache.
+    Like `functools.lru_cache`, the wrapper exposes `cache_clear()`.
+    """
+
+    def decorator(fn):
+        cache: "OrderedDict[Any, Tuple[float, asyncio.Task]]" = OrderedDict()
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            entry = cache.get(key)
+            if entry is not None and entry[0] > now:
+                cache.move_to_end(key)
+                return await asyncio.shield(entry[1])
+
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            cache[key] = (now + ttl, task)
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+
+            def evict_failures(done: asyncio.Task) -> None:
+                failed = (
+                    done.cancelled()
+                    or done.exception() is not None
+                    or _is_error_result(done.result())
+                )
+                if failed and cache.get(key, (None, None))[1] is done:
+                    del cache[key]
+
+            task.add_done_callback(evict_failures)
+            return await asyncio.shield(task)
+
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+async def _invoke_lambda_raw(
+    region: str,
+    function_name: str,
+    payload: bytes,
+    read_timeout: Optional[int] = None,
+    invocation_type: str = "RequestResponse",
+) -> Tuple[Dict[str, Any], bytes]:
+    """Invokes `function_name` without blocking the event loop.
+
+    The blocking boto3 call and the read of the response stream both run on
+    `_lambda_executor`. Returns the raw invoke response and the payload bytes so
+    callers can inspect `StatusCode` / `FunctionError` themselves.
+    """
+    lambda_client = _get_lambda_client(region, read_timeout=read_timeout)
+
+    def invoke() -> Tuple[Dict[str, Any], bytes]:
+        response = lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType=invocation_type,
+            LogType="None",  # never ship a base64 log tail back with the payload
+            Payload=payload,
+        )
+        return response, response["Payload"].read()
+
+    return await asyncio.get_running_loop().run_in_executor(_lambda_executor, invoke)
+
+
+async def _invoke_lambda(
+    region: str,
+    function_name: str,
+    payload: bytes,
+    read_timeout: Optional[int] = None,
+) -> Any:
+    """Invokes `function_name` and returns its decoded JSON response payload."""
+    _, response_payload_raw = await _invoke_lambda_raw(
+        region, function_name, payload, read_timeout=read_timeout
+    )
+    return _loads(response_payload_raw)
+
+
+async def _submit_lambda(
+    region: str, function_name: str, payload: bytes
+) -> Dict[str, Any]:
+    """Queues an asynchronous (`Event`) invocation of `function_name`.
+
+    Returns as soon as Lambda has accepted the request, without waiting for the
+    function to run.
+    """
+    response, _ = await _invoke_lambda_raw(
+        region, function_name, payload, invocation_type="Event"
+    )
+    return {
+        "success": True,
+        "message": "submitted",
+        "status_code": response["StatusCode"],
+    }
+
+
+async def _get_function_architectures(
+    region: str, function_name: str
+) -> Optional[List[str]]:
+    """Returns the architectures `function_name` is configured for.
+
+    Returns None if the configuration cannot be read (missing function, no
+    permission, network error); callers then fall back to the backend tool.
+    """
+    lambda_client = _get_lambda_client(region)
+    try:
+        configuration = await asyncio.get_running_loop().run_in_executor(
+            _lambda_executor,
+            functools.partial(
+                lambda_client.get_function_configuration, FunctionName=function_name
+            ),
+        )
+    except (BotoCoreError, ClientError):
+        return None
+    # Functions created before multi-architecture support omit the field.
+    return configuration.get("Architectures", ["x86_64"])
 
 
 @mcp.tool()
+@_async_ttl_cache(ttl=60)
 async def delete_unused_resource() -> dict:
     """Invokes a Lambda function to identify potentially unused and unattached resources.
 
@@ -65,16 +311,13 @@ async def delete_unused_resource() -> dict:
                 }
               }
     """
-    results = boto3.client("lambda", region_name="us-east-1").invoke(
-        FunctionName="unused_resource_tool",
-        InvocationType="RequestResponse",
-        Payload=json.dumps({"operation": "analyze"}),
+    return await _invoke_lambda(
+        "us-east-1", "unused_resource_tool", _UNUSED_RESOURCE_PAYLOAD
     )
-    results = json.loads(results["Payload"].read())
-    return results
 
 
 @mcp.tool()
+@_async_ttl_cache(ttl=300)
 async def analyze_repo_arm_compatibility(repo_url: str) -> dict:
     """
     Checks if the code in a given GitHub repository is compatible with the ARM64 architecture.
@@ -100,13 +343,11 @@ async def analyze_repo_arm_compatibility(repo_url: str) -> dict:
             - 'context' (dict): Metadata about the analysis process.
             - 'error' (str, optional): If the analysis failed, this key will contain an error message.
     """
-    results = boto3.client("lambda", region_name="ap-northeast-2").invoke(
-        FunctionName="arm-compatibility-analyzer",
-        InvocationType="RequestResponse",
-        Payload=json.dumps({"github_url": repo_url}),
+    return await _invoke_lambda(
+        "ap-northeast-2",
+        "arm-compatibility-analyzer",
+        _dumps({"github_url": repo_url}),
     )
-    results = json.loads(results["Payload"].read())
-    return results
 
 @mcp.tool()
 async def lambda_search(function_name_query: str, region: Optional[str] = None) -> dict:
@@ -143,16 +384,19 @@ async def lambda_search(function_name_query: str, region: Optional[str] = None)
     if region:
         payload["region"] = region
         
-    results = boto3.client("lambda", region_name="ap-northeast-2").invoke(
-        FunctionName="lambda_search_tool",
-        InvocationType="RequestResponse",
-        Payload=json.dumps(payload),
+    encoded_payload = _dumps(payload)
+    return await _coalesce(
+        "lambda_search_tool",
+        encoded_payload,
+        lambda: _invoke_lambda(
+            "ap-northeast-2", "lambda_search_tool", encoded_payload
+        ),
     )
-    results = json.loads(results["Payload"].read())
-    return results
 
 @mcp.tool()
-async def lambda_arch_change(function_name: str, target_arch: str) -> dict:
+async def lambda_arch_change(
+    function_name: str, target_arch: str, async_invoke: bool = False
+) -> dict:
     """
     Changes the architecture of a specific, existing AWS Lambda function to the specified target architecture (arm64 or x86_64).
     category: arm_tools
@@ -166,6 +410,7 @@ async def lambda_arch_change(function_name: str, target_arch: str) -> dict:
     Args:
         function_name (str): The exact name of the existing Lambda function in AWS.
         target_arch (str): The desired architecture. Must be either "arm64" or "x86_64".
+        async_invoke (bool, optional): If True, only submit the change and return immediately with {'success': True, 'message': 'submitted', 'status_code': 202} instead of waiting for the outcome. Defaults to False.
 
     Returns:
         dict: A dictionary indicating the outcome of the operation.
@@ -175,50 +420,66 @@ async def lambda_arch_change(function_name: str, target_arch: str) -> dict:
             - 'error_code' (str, optional): The AWS error code if an AWS ClientError occurred.
     """
     # Basic validation for target_arch
-    if target_arch not in ["arm64", "x86_64"]:
-        return {"success": False, "error": f"Invalid target_arch '{target_arch}'. Must be 'arm64' or 'x86_64'."}
+    if target_arch not in _VALID_ARCHS:
+        return {
+            "success": False,
+            "error": f"Invalid target_arch '{target_arch}'. "
+            "Must be 'arm64' or 'x86_64'.",
+        }
+
+    # Skip the backend invoke when the function is already on target_arch
+    architectures = await _get_function_architectures("ap-northeast-2", function_name)
+    if architectures == [target_arch]:
+        return {"success": True, "message": f"Function already uses {target_arch}"}
 
-    lambda_client = boto3.client("lambda", region_name="ap-northeast-2")
     payload = {
         "function_name": function_name,
         "target_arch": target_arch # Pass the target architecture
     }
     try:
-        response = await asyncio.to_thread(
-            lambda_client.invoke,
-            FunctionName="lambda_architecture_change_tool",
-            InvocationType="RequestResponse",
-            Payload=json.dumps(payload),
+        if async_invoke:
+            return await _submit_lambda(
+                "ap-northeast-2", "lambda_architecture_change_tool", _dumps(payload)
+            )
+        return await _invoke_lambda(
+            "ap-northeast-2", "lambda_architecture_change_tool", _dumps(payload)
         )
-        response_payload_raw = response['Payload'].read().decode('utf-8')
-        response_payload = json.loads(response_payload_raw)
-        return response_payload
     except Exception as e:
         return {"success": False, "error": str(e)}
 
 
 
 
+@_async_ttl_cache(ttl=60)
+async def _fetch_instance_info() -> dict:
+    # The TTL cache already single-flights; going through _coalesce as well would
+    # let a caller after cache_clear() join an invoke started before the clear.
+    return await _invoke_lambda(
+        "us-east-1", "instance_optimize_tool", _GET_INSTANCE_INFO_PAYLOAD
+    )
+
+
 @mcp.tool()
-async def get_instance_info() -> dict:
+async def get_instance_info(force_refresh: bool = False) -> dict:
     """Get detailed EC2 instance information across regions, including CPU usage
     and optimization recommendations, returned as a JSON object.
 
+    Results are reused for up to 60 seconds and dropped whenever
+    `modify_instance_type` runs.
+
+    Args:
+        force_refresh: Ignore the reused result and fetch fresh data.
+
     Returns:
         dict: A dictionary with keys 'optimizations_needed', 'instances_ok', and 'errors'.
               'optimizations_needed': List of instances needing scaling adjustments.
               'instances_ok': List of instances with normal CPU usage.
               'errors': List of errors encountered during data fetching.
     """
-    results = boto3.client("lambda", region_name="us-east-1").invoke(
-        FunctionName="instance_optimize_tool",
-        InvocationType="RequestResponse",
-        Payload=json.dumps({"body": {"tool_name": "get_instance_info"}}),
-    )
-    results = json.loads(results["Payload"].read())
-
+    if force_refresh:
+        _fetch_instance_info.cache_clear()
     # Return the structured results
-    return results
+    return await _fetch_instance_info()
 
 
 @mcp.tool()
@@ -229,21 +490,20 @@ async def modify_instance_type(instance_id: str, new_type: str) -> str:
         instance_id: The ID of the instance to modify.
         new_type: The target instance type (e.g., t2.medium).
     """
-    results = boto3.client("lambda", region_name="us-east-1").invoke(
-        FunctionName="instance_optimize_tool",
-        InvocationType="RequestResponse",
-        Payload=json.dumps(
-            {
-                "body": {
-                    "tool_name": "modify_instance_type",
-                    "instance_id": instance_id,
-                    "new_type": new_type,
-                }
+    payload = _dumps(
+        {
+            "body": {
+                "tool_name": "modify_instance_type",
+                "instance_id": instance_id,
+                "new_type": new_type,
             }
-        ),
+        }
     )
-    results = json.loads(results["Payload"].read())
-    return results
+    try:
+        return await _invoke_lambda("us-east-1", "instance_optimize_tool", payload)
+    finally:
+        # The instance listing is stale once a resize may have been applied.
+        _fetch_instance_info.cache_clear()
 
 
 @mcp.tool()
@@ -301,18 +561,179 @@ async def create_vpc_endpoint(
 
     """
 
-    payload = json.dumps(
+    payload = _dumps(
         {"instance_id": instance_id, "region": region, "days": days, "hours": hours}
     )
 
-    results = boto3.client("lambda", region_name="ap-northeast-2").invoke(
-        FunctionName="network_optimize_lambda",
-        InvocationType="RequestResponse",
-        Payload=payload,
+    return await _invoke_lambda("ap-northeast-2", "network_optimize_lambda", payload)
+
+
+def _unwrap_lambda_response(
+    response: Dict[str, Any], response_payload_raw: bytes
+) -> Dict[str, Any]:
+    """Turns an API-Gateway-style Lambda response into the tool result.
+
+    Backends answer with `{"statusCode": ..., "body": ...}` where `body` is either
+    a JSON string or already an object. Failures are mapped to
+    `{"success": False, "error": ..., "details": ...}`. Raises
+    `json.JSONDecodeError` if the outer payload is not valid JSON.
+    """
+    if response.get("FunctionError"):  # Check for unhandled errors in Lambda
+        return {
+            "success": False,
+            "error": f"Lambda function error: {response['FunctionError']}",
+            "details": response_payload_raw.decode("utf-8", "replace"),
+        }
+
+    response_payload = _loads(response_payload_raw)
+    if not isinstance(response_payload, dict):
+        return {
+            "success": False,
+            "error": "Unexpected Lambda response format",
+            "details": response_payload,
+        }
+
+    lambda_status_code = response.get("StatusCode", 200)
+    if lambda_status_code != 200:
+        error_body = response_payload.get("body", response_payload)
+        if isinstance(error_body, (bytes, str)):
+            try:
+                error_body = _loads(error_body)
+            except json.JSONDecodeError:
+                pass
+        return {
+            "success": False,
+            "error": f"Lambda execution failed (status {lambda_status_code})",
+            "details": error_body,
+        }
+
+    # Lambda 함수의 응답 본문(body)을 직접 반환 (문자열이면 한 번 더 파싱)
+    body = response_payload.get("body")
+    if isinstance(body, dict):
+        return body
+    if isinstance(body, (bytes, str)):
+        try:
+            return _loads(body)
+        except json.JSONDecodeError:
+            pass
+    if body is None:
+        return {
+            "success": False,
+            "error": "Unexpected Lambda response format",
+            "details": response_payload,
+        }
+    return {
+        "success": False,
+        "error": "Failed to parse Lambda response body",
+        "raw_body": body,
+    }
+
+
+async def _invoke_ebs_lambda(
+    payload: dict, read_timeout: Optional[int] = None
+) -> Dict[str, Any]:
+    """Invokes the EBS Optimizer Lambda function and unwraps its response.
+
+    Shared by `analyze_ebs_volumes_tool` and `execute_ebs_action_tool`, which only
+    differ in the payload they send.
+    """
+    response_payload_raw = b""
+
+    try:
+        response, response_payload_raw = await _invoke_lambda_raw(
+            "ap-northeast-2",
+            "ebs-optimizer-lambda",
+            _dumps(payload),
+            read_timeout=read_timeout,
+        )
+        return _unwrap_lambda_response(response, response_payload_raw)
+
+    except ClientError as e:
+        return {"success": False, "error": f"Failed to invoke Lambda: {e}"}
+    except json.JSONDecodeError as e:
+        return {
+            "success": False,
+            "error": f"Failed to decode Lambda response: {e}",
+            "raw_response": response_payload_raw.decode("utf-8", "replace"),
+        }
+    except Exception as e:
+        return {"success": False, "error": f"Error processing Lambda response: {e}"}
+
+
+def _chunk_volume_ids(volume_ids: List[str]) -> List[List[str]]:
+    """Splits `volume_ids` into balanced chunks of at most EBS_ANALYZE_CHUNK_SIZE.
+
+    Chunks are balanced so none holds a single volume (unless only one was
+    requested), which the backend would answer with the single-volume response
+    shape instead of the list shape.
+    """
+    chunk_count = -(-len(volume_ids) // EBS_ANALYZE_CHUNK_SIZE)
+    base, extra = divmod(len(volume_ids), chunk_count)
+    chunks, start = [], 0
+    for i in range(chunk_count):
+        end = start + base + (1 if i < extra else 0)
+        chunks.append(volume_ids[start:end])
+        start = end
+    return chunks
+
+
+def _analyze_ebs_chunk(region: str, chunk: List[str]) -> Awaitable[Dict[str, Any]]:
+    """Starts the analysis of one chunk of volume IDs."""
+    return _invoke_ebs_lambda(
+        {"operation": "analyze", "region": region, "volume_ids": chunk},
+        read_timeout=EBS_ANALYZE_READ_TIMEOUT,
+    )
+
+
+def _merge_ebs_analyses(
+    chunk_results: List[Tuple[List[str], Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """Merges per-chunk analysis results into one region-wide response."""
+    if len(chunk_results) == 1:
+        return chunk_results[0][1]
+
+    merged: Dict[str, Any] = {
+        "success": False,
+        "summary": {},
+        "idle_volumes": [],
+        "overprovisioned_volumes": [],
+        "errors": [],
+    }
+    for chunk, result in chunk_results:
+        if not result.get("success"):
+            merged["errors"].append(
+                {
+                    "volume_ids": chunk,
+                    "error": result.get("error"),
+                    "details": result.get("details"),
+                }
+            )
+            continue
+        merged["success"] = True
+        for key, count in result.get("summary", {}).items():
+            if isinstance(count, (int, float)):
+                merged["summary"][key] = merged["summary"].get(key, 0) + count
+        merged["idle_volumes"].extend(result.get("idle_volumes", []))
+        merged["overprovisioned_volumes"].extend(
+            result.get("overprovisioned_volumes", [])
+        )
+        merged["errors"].extend(result.get("errors", []))
+
+    if not merged["success"]:
+        # Every chunk failed critically; report it like a single failed invoke.
+        return chunk_results[0][1]
+    return merged
+
+
+async def _analyze_ebs_volume_chunks(
+    region: str, volume_ids: List[str]
+) -> Dict[str, Any]:
+    """Analyzes `volume_ids` in parallel chunks and merges the per-chunk results."""
+    chunks = _chunk_volume_ids(volume_ids)
+    results = await asyncio.gather(
+        *[_analyze_ebs_chunk(region, chunk) for chunk in chunks]
     )
-    results = json.loads(results["Payload"].read())
-    # pprint.pprint(results)
-    return results
+    return _merge_ebs_analyses(list(zip(chunks, results)))
 
 
 @mcp.tool()
@@ -335,6 +756,7 @@ async def analyze_ebs_volumes_tool(
     Args:
         region (str): The AWS region (e.g., 'us-east-1', 'ap-northeast-2') where the EBS volumes reside. This parameter is REQUIRED.
         volume_id (Optional[str]): The specific ID of a single EBS volume to analyze (e.g., 'vol-0123456789abcdef0'). If provided, only this volume will be analyzed within the specified region. If omitted, *all* EBS volumes in the specified region will be analyzed. The format must start with 'vol-'.
+        volume_ids (Optional[List[str]]): Several EBS volume IDs to analyze together. Takes precedence over 'volume_id'. Large lists are split and analyzed in parallel; the results are merged into the same structure as a region-wide analysis.
 
     Returns:
         Dict[str, Any]: A dictionary containing the analysis results.
@@ -358,8 +780,6 @@ async def analyze_ebs_volumes_tool(
     - Check the 'success' key first. If 'success' is False, report the 'error' message to the user.
     - The analysis might take some time, especially when scanning all volumes in a region. Inform the user that the process is running.
     """
-    lambda_client = boto3.client("lambda", region_name="ap-northeast-2")
-
     payload = {
         "operation": "analyze",
         "region": region,  # 분석/액션 대상 리전
@@ -369,73 +789,14 @@ async def analyze_ebs_volumes_tool(
     elif volume_id:
         payload["volume_ids"] = [volume_id]
 
-    try:
-        response = await asyncio.to_thread(
-            lambda_client.invoke,
-            FunctionName="ebs-optimizer-lambda",
-            InvocationType="RequestResponse",  # Synchronous invocation
-            Payload=json.dumps(payload),
+    if volume_ids and len(volume_ids) > EBS_ANALYZE_CHUNK_SIZE:
+        invoke = functools.partial(_analyze_ebs_volume_chunks, region, volume_ids)
+    else:
+        invoke = functools.partial(
+            _invoke_ebs_lambda, payload, read_timeout=EBS_ANALYZE_READ_TIMEOUT
         )
 
-        response_payload_raw = response["Payload"].read().decode("utf-8")
-        response_payload = json.loads(response_payload_raw)
-
-        lambda_status_code = response.get("StatusCode", 200)
-        if lambda_status_code != 200:
-            error_body = response_payload.get("body", json.dumps(response_payload))
-            try:
-                parsed_error = json.loads(error_body)
-                return {
-                    "success": False,
-                    "error": f"Lambda execution failed (status {lambda_status_code})",
-                    "details": parsed_error,
-                }
-            except json.JSONDecodeError:
-                return {
-                    "success": False,
-                    "error": f"Lambda execution failed (status {lambda_status_code})",
-                    "details": error_body,
-                }
-
-        # Lambda 함수의 응답 본문(body)을 직접 반환 (이미 JSON 객체로 가정)
-        if isinstance(response_payload, dict) and "body" in response_payload:
-            try:
-                body_content = json.loads(
-                    response_payload["body"]
-                )  # body가 문자열일 경우 JSON 파싱
-                return body_content
-            except (json.JSONDecodeError, TypeError) as e:
-                # body가 이미 객체일 수 있으므로 그대로 반환 시도
-                if isinstance(response_payload["body"], dict):
-                    return response_payload["body"]
-                return {
-                    "success": False,
-                    "error": "Failed to parse Lambda response body",
-                    "raw_body": response_payload["body"],
-                }
-        elif response.get("FunctionError"):  # Check for unhandled errors in Lambda
-            return {
-                "success": False,
-                "error": f"Lambda function error: {response['FunctionError']}",
-                "details": response_payload_raw,
-            }
-        else:
-            return {
-                "success": False,
-                "error": "Unexpected Lambda response format",
-                "details": response_payload,
-            }
-
-    except ClientError as e:
-        return {"success": False, "error": f"Failed to invoke Lambda: {e}"}
-    except json.JSONDecodeError as e:
-        return {
-            "success": False,
-            "error": f"Failed to decode Lambda response: {e}",
-            "raw_response": response_payload_raw,
-        }
-    except Exception as e:
-        return {"success": False, "error": f"Error processing Lambda response: {e}"}
+    return await _coalesce("ebs-optimizer-lambda", _dumps(payload), invoke)
 
 
 @mcp.tool()
@@ -443,6 +804,7 @@ async def execute_ebs_action_tool(
     volume_id: str,
     action_type: str,
     region: str,  # 액션 대상 리전
+    async_invoke: bool = False,
 ) -> Dict[str, Any]:
     """Executes a specific action on an AWS Elastic Block Store (EBS) volume by invoking the EBS Optimizer Lambda function.
 
@@ -466,6 +828,7 @@ async def execute_ebs_action_tool(
         volume_id (str): The ID of the EBS volume to act upon (e.g., 'vol-0123456789abcdef0'). Must start with 'vol-'.
         action_type (str): The type of action to perform. Must be one of: "snapshot_only", "snapshot_and_delete", "change_type", "resize", "change_type_and_resize".
         region (str): The AWS region (e.g., 'us-east-1', 'ap-northeast-2') where the EBS volume resides.
+        async_invoke (bool, optional): If True, only submit the action and return immediately with {'success': True, 'message': 'submitted', 'status_code': 202, 'request_id': ...} instead of waiting for it to finish. The 'request_id' is also sent to the Lambda function so its outcome can be correlated later. Useful for long-running snapshots. Defaults to False.
 
     Returns:
         Dict[str, Any]: A dictionary containing the action execution results.
@@ -486,7 +849,13 @@ async def execute_ebs_action_tool(
     - Actions like "snapshot_and_delete" are irreversible - use with caution.
     - Root volumes are protected from certain actions (e.g., deletion, size reduction).
     """
-    lambda_client = boto3.client("lambda", region_name="ap-northeast-2")
+    # Reject unsupported actions before paying for a Lambda round-trip
+    if action_type not in _VALID_EBS_ACTIONS:
+        return {
+            "success": False,
+            "error": f"Invalid action_type '{action_type}'. Must be one of: "
+            + ", ".join(sorted(_VALID_EBS_ACTIONS)),
+        }
 
     payload = {
         "operation": "execute",
@@ -495,99 +864,170 @@ async def execute_ebs_action_tool(
         "action_type": action_type,
     }
 
-    try:
-        response = await asyncio.to_thread(
-            lambda_client.invoke,
-            FunctionName="ebs-optimizer-lambda",
-            InvocationType="RequestResponse",
-            Payload=json.dumps(payload),
-        )
+    if async_invoke:
+        # Correlation id for the detached run; the backend receives it as well.
+        payload["request_id"] = uuid.uuid4().hex
+        try:
+            result = await _submit_lambda(
+                "ap-northeast-2", "ebs-optimizer-lambda", _dumps(payload)
+            )
+        except (BotoCoreError, ClientError) as e:
+            return {"success": False, "error": f"Failed to invoke Lambda: {e}"}
+        result["request_id"] = payload["request_id"]
+        return result
 
-        response_payload_raw = response["Payload"].read().decode("utf-8")
-        response_payload = json.loads(response_payload_raw)
+    return await _invoke_ebs_lambda(payload)
 
-        lambda_status_code = response.get("StatusCode", 200)
-        if lambda_status_code != 200:
-            error_body = response_payload.get("body", json.dumps(response_payload))
-            try:
-                parsed_error = json.loads(error_body)
-                return {
-                    "success": False,
-                    "error": f"Lambda execution failed (status {lambda_status_code})",
-                    "details": parsed_error,
-                }
-            except json.JSONDecodeError:
-                return {
-                    "success": False,
-                    "error": f"Lambda execution failed (status {lambda_status_code})",
-                    "details": error_body,
-                }
 
-        if isinstance(response_payload, dict) and "body" in response_payload:
-            try:
-                body_content = json.loads(response_payload["body"])
-                return body_content
-            except (json.JSONDecodeError, TypeError) as e:
-                if isinstance(response_payload["body"], dict):
-                    return response_payload["body"]
-                return {
-                    "success": False,
-                    "error": "Failed to parse Lambda response body",
-                    "raw_body": response_payload["body"],
-                }
-        elif response.get("FunctionError"):
+@mcp.tool()
+async def analyze_then_execute_ebs(
+    volume_ids: List[str],
+    region: str,
+    idle_action: str,
+    overprovisioned_action: str,
+) -> Dict[str, Any]:
+    """Analyzes the given EBS volumes and immediately executes an action on every volume the analysis flags, in one step.
+
+    Analysis runs in parallel chunks, and the action for a flagged volume starts as soon as its chunk's analysis returns, overlapping with the analyses still running. This is much faster than calling `analyze_ebs_volumes_tool` and then `execute_ebs_action_tool` once per volume.
+
+    **When to use this tool:**
+    - User asks to analyze specific EBS volumes AND apply the recommended optimizations in the same request (e.g., "check these volumes and fix whatever is wasteful").
+
+    **When NOT to use this tool:**
+    - User only wants analysis results - use `analyze_ebs_volumes_tool`.
+    - User wants a specific action on a specific volume - use `execute_ebs_action_tool`.
+    - User has not named the volumes to act on. This tool never scans a whole region.
+
+    Args:
+        volume_ids (List[str]): The EBS volume IDs to analyze (e.g., ['vol-0123456789abcdef0']). Each must start with 'vol-'.
+        region (str): The AWS region (e.g., 'us-east-1', 'ap-northeast-2') where the volumes reside.
+        idle_action (str): Action for volumes found idle. One of the action types supported by `execute_ebs_action_tool`. Use "snapshot_only", which keeps the volume, unless the user asked for something else.
+        overprovisioned_action (str): Action for volumes found overprovisioned. One of the action types supported by `execute_ebs_action_tool`. Use "snapshot_only" unless the user asked for the volumes to be resized or retyped.
+
+    Returns:
+        Dict[str, Any]: A dictionary with:
+            - 'success' (bool): False only if the input was invalid or the analysis itself failed.
+            - 'analysis' (dict): The merged analysis result, in the same structure `analyze_ebs_volumes_tool` returns.
+            - 'actions' (List[dict]): One entry per flagged volume, with 'volume_id', 'action_type' and 'result' (the `execute_ebs_action_tool`-style result of that action). Actions started before a failure are still listed.
+            - 'error' (str, optional): Present if processing the analysis failed part-way.
+
+    **Important Notes for LLM:**
+    - Only pass a mutating action ("change_type", "resize", "change_type_and_resize" or "snapshot_and_delete") if the user explicitly asked for that change. Otherwise pass "snapshot_only" for both actions.
+    - Only pass idle_action="snapshot_and_delete" if the user explicitly asked for idle volumes to be deleted. Deletion is irreversible.
+    - Report any action whose 'result' has 'success': False to the user.
+    """
+    for action in (idle_action, overprovisioned_action):
+        if action not in _VALID_EBS_ACTIONS:
             return {
                 "success": False,
-                "error": f"Lambda function error: {response['FunctionError']}",
-                "details": response_payload_raw,
+                "error": f"Invalid action_type '{action}'. Must be one of: "
+                + ", ".join(sorted(_VALID_EBS_ACTIONS)),
             }
-        else:
-            return {
-                "success": False,
-                "error": "Unexpected Lambda response format",
-                "details": response_payload,
+    if not volume_ids:
+        return {"success": False, "error": "volume_ids must not be empty"}
+
+    async def analyze(chunk: List[str]) -> Tuple[List[str], Dict[str, Any]]:
+        return chunk, await _analyze_ebs_chunk(region, chunk)
+
+    async def execute(volume_id: str, action_type: str) -> Dict[str, Any]:
+        result = await _invoke_ebs_lambda(
+            {
+                "operation": "execute",
+                "region": region,
+                "volume_id": volume_id,
+                "action_type": action_type,
             }
+        )
+        return {"volume_id": volume_id, "action_type": action_type, "result": result}
 
-    except ClientError as e:
-        return {"success": False, "error": f"Failed to invoke Lambda: {e}"}
-    except json.JSONDecodeError as e:
-        return {
-            "success": False,
-            "error": f"Failed to decode Lambda response: {e}",
-            "raw_response": response_payload_raw,
-        }
+    # One action per volume: a repeated id would otherwise be acted on twice.
+    volume_ids = list(dict.fromkeys(volume_ids))
+
+    chunk_results = []
+    executions = []
+    analysis: Dict[str, Any] = {}
+    error = None
+    try:
+        for analysis in asyncio.as_completed(
+            [analyze(chunk) for chunk in _chunk_volume_ids(volume_ids)]
+        ):
+            chunk, result = await analysis
+            chunk_results.append((chunk, result))
+            if not result.get("success"):
+                continue
+            # volume_id -> action_type; idle takes precedence over overprovisioned.
+            flagged: Dict[str, str] = {}
+            if "volume_id" in result:  # single-volume response shape
+                volume_id = result["volume_id"]
+                if volume_id and result.get("is_idle"):
+                    flagged[volume_id] = idle_action
+                elif volume_id and result.get("is_overprovisioned"):
+                    flagged[volume_id] = overprovisioned_action
+            else:
+                for action_type, key in (
+                    (overprovisioned_action, "overprovisioned_volumes"),
+                    (idle_action, "idle_volumes"),
+                ):
+                    for volume in result.get(key, []):
+                        # Entries without an id cannot be acted on.
+                        if volume.get("volume_id"):
+                            flagged[volume["volume_id"]] = action_type
+            # Start the actions now so they overlap with the remaining analyses.
+            executions.extend(
+                asyncio.ensure_future(execute(volume_id, action_type))
+                for volume_id, action_type in flagged.items()
+            )
+        analysis = _merge_ebs_analyses(chunk_results)
     except Exception as e:
-        return {"success": False, "error": f"Error processing Lambda response: {e}"}
+        error = f"Error processing EBS analysis: {e}"
+    finally:
+        # Actions already started are mutating; always wait for and report them.
+        actions = list(await asyncio.gather(*executions))
+
+    response = {
+        "success": error is None and bool(analysis.get("success")),
+        "analysis": analysis,
+        "actions": actions,
+    }
+    if error is not None:
+        response["error"] = error
+    return response
+
+
+# The SSE transport, MCP server and routes live for the whole process, so they
+# are built once at import rather than captured in a per-app closure.
+sse = SseServerTransport("/messages/")
+mcp_server: Server = mcp._mcp_server  # noqa: WPS437
+
+
+async def handle_sse(request: Request) -> Response:
+    """Serves one MCP session over an SSE connection."""
+    async with sse.connect_sse(
+        request.scope,
+        request.receive,
+        request._send,  # noqa: SLF001
+    ) as (read_stream, write_stream):
+        await mcp_server.run(
+            read_stream,
+            write_stream,
+            mcp_server.create_initialization_options(),
+        )
+    # The SSE stream has already been answered; Starlette still expects a response.
+    return Response()
 
 
-def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
-    """Create a Starlette application that can server the provied mcp server with SSE."""
-    sse = SseServerTransport("/messages/")
-
-    async def handle_sse(request: Request) -> None:
-        async with sse.connect_sse(
-            request.scope,
-            request.receive,
-            request._send,  # noqa: SLF001
-        ) as (read_stream, write_stream):
-            await mcp_server.run(
-                read_stream,
-                write_stream,
-                mcp_server.create_initialization_options(),
-            )
+routes = [
+    Route("/sse", endpoint=handle_sse),
+    Mount("/messages/", app=sse.handle_post_message),
+]
 
-    return Starlette(
-        debug=debug,
-        routes=[
-            Route("/sse", endpoint=handle_sse),
-            Mount("/messages/", app=sse.handle_post_message),
-        ],
-    )
 
+def create_starlette_app(*, debug: bool = False) -> Starlette:
+    """Create a Starlette application that serves the MCP server with SSE."""
+    return Starlette(debug=debug, routes=routes)
 
-if __name__ == "__main__":
-    mcp_server = mcp._mcp_server  # noqa: WPS437
 
+if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Run MCP SSE-based server")
@@ -596,6 +1036,16 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     # Bind SSE request handling to MCP server
-    starlette_app = create_starlette_app(mcp_server, debug=True)
-
-    uvicorn.run(starlette_app, host=args.host, port=args.port)
+    starlette_app = create_starlette_app(debug=True)
+
+    # Single process on purpose: SseServerTransport keeps sessions in memory, so
+    # a POST to /messages/ must reach the process that owns the /sse stream.
+    uvicorn.run(
+        starlette_app,
+        host=args.host,
+        port=args.port,
+        loop="uvloop",
+        http="httptools",
+        log_level="warning",
+        access_log=False,
+    )